@@ -11,8 +11,6 @@ def create_app():
     """Application factory"""
     app = Flask(__name__)
     app.config.from_object(Config)
-    app.config['CACHE_TYPE'] = 'SimpleCache'
-    app.config['CACHE_DEFAULT_TIMEOUT'] = 3600 
     
     CORS(app) 
     
@@ -1,9 +1,34 @@
-from flask import Blueprint, jsonify, request
+import orjson
+from flask import Blueprint, Response, request
 from app.services.vehicle_service import VehicleService
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Iterator
 
 vehicle_bp = Blueprint("vehicle", __name__)
 
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _json_response(payload: Any) -> Response:
+    """Serialize a payload with orjson"""
+    return Response(
+        orjson.dumps(payload, option=ORJSON_OPTIONS), mimetype="application/json"
+    )
+
+
+def _stream_search_result(result: Dict[str, Any]) -> Iterator[bytes]:
+    """Encode a search result, emitting its listings one at a time"""
+    head = {key: value for key, value in result.items() if key != "listings"}
+    yield orjson.dumps(head, option=ORJSON_OPTIONS)[:-1]
+    yield b',"listings":[' if head else b'"listings":['
+
+    for i, listing in enumerate(result["listings"]):
+        if i:
+            yield b","
+        yield orjson.dumps(listing, option=ORJSON_OPTIONS)
+
+    yield b"]}"
+
+
 @vehicle_bp.route("/search", methods=["GET"])
 def search() -> Tuple[Dict[str, Any], int]:
     """
@@ -68,10 +93,13 @@ def search() -> Tuple[Dict[str, Any], int]:
         result = VehicleService.calculate_market_value(
             year, make, model, mileage, trim, color, state
         )
-        return jsonify(result), 200
     except Exception as e:
         return {"error": str(e)}, 500
 
+    if "listings" not in result:
+        return _json_response(result), 200
+    return Response(_stream_search_result(result), mimetype="application/json"), 200
+
 
 @vehicle_bp.route("/makes-models", methods=["GET"])
 def get_makes_and_models() -> Tuple[Dict[str, Any], int]:
@@ -86,6 +114,6 @@ def get_makes_and_models() -> Tuple[Dict[str, Any], int]:
     """
     try:
         data = VehicleService.get_makes_and_models()
-        return jsonify(data), 200
+        return _json_response(data), 200
     except Exception as e:
         return {"error": str(e)}, 500
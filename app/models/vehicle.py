@@ -1,9 +1,14 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, Index
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, Index, event
 from app import db
 
-Base = declarative_base()
+CANONICAL_COLUMNS = ('make', 'model', 'exterior_color', 'dealer_state')
+
+
+def canonicalize(value):
+    """Canonical form of a filterable string column: stripped and upper-cased"""
+    return value.strip().upper() if isinstance(value, str) else value
+
 
 class Vehicle(db.Model):
     __tablename__ = 'vehicles'
@@ -36,30 +41,68 @@ class Vehicle(db.Model):
     listing_status = Column(String(50))
 
     __table_args__ = (
-        Index('idx_year_make_model', 'year', 'make', 'model'),
+        Index(
+            'idx_ymm_covering',
+            'year', 'make', 'model', 'listing_mileage', 'listing_price',
+        ),
         Index('idx_make_model_year', 'make', 'model', 'year'),
         Index('idx_price_mileage', 'listing_price', 'listing_mileage'),
     )
 
     def to_dict(self):
       """Convert model instance to dictionary"""
+      return Vehicle.row_to_dict(self)
+
+    @staticmethod
+    def row_to_dict(row):
+      """Convert a Vehicle instance or a Core row of LISTING_COLUMNS to dictionary"""
       return {
-          'id': self.id,
-          'vin': self.vin,
-          'year': self.year,
-          'make': self.make,
-          'model': self.model,
-          'trim': self.trim,
-          'dealer_name': self.dealer_name,
-          'dealer_location': f"{self.dealer_city}, {self.dealer_state}",
-          'price': float(self.listing_price) if self.listing_price else None,
-          'mileage': self.listing_mileage,
-          'used': self.used,
-          'certified': self.certified,
-          'style': self.style,
-          'driven_wheels': self.driven_wheels,
-          'engine': self.engine,
-          'fuel_type': self.fuel_type,
-          'exterior_color': self.exterior_color,
-          'interior_color': self.interior_color
-      }
\ No newline at end of file
+          'id': row.id,
+          'vin': row.vin,
+          'year': row.year,
+          'make': row.make,
+          'model': row.model,
+          'trim': row.trim,
+          'dealer_name': row.dealer_name,
+          'dealer_location': f"{row.dealer_city}, {row.dealer_state}",
+          'price': float(row.listing_price) if row.listing_price else None,
+          'mileage': row.listing_mileage,
+          'used': row.used,
+          'certified': row.certified,
+          'style': row.style,
+          'driven_wheels': row.driven_wheels,
+          'engine': row.engine,
+          'fuel_type': row.fuel_type,
+          'exterior_color': row.exterior_color,
+          'interior_color': row.interior_color
+      }
+
+
+LISTING_COLUMNS = (
+    Vehicle.id,
+    Vehicle.vin,
+    Vehicle.year,
+    Vehicle.make,
+    Vehicle.model,
+    Vehicle.trim,
+    Vehicle.dealer_name,
+    Vehicle.dealer_city,
+    Vehicle.dealer_state,
+    Vehicle.listing_price,
+    Vehicle.listing_mileage,
+    Vehicle.used,
+    Vehicle.certified,
+    Vehicle.style,
+    Vehicle.driven_wheels,
+    Vehicle.engine,
+    Vehicle.fuel_type,
+    Vehicle.exterior_color,
+    Vehicle.interior_color,
+)
+
+
+@event.listens_for(Vehicle, 'before_insert')
+@event.listens_for(Vehicle, 'before_update')
+def _canonicalize_columns(mapper, connection, target):
+    for column in CANONICAL_COLUMNS:
+        setattr(target, column, canonicalize(getattr(target, column)))
@@ -1,88 +1,137 @@
-from sqlalchemy import func, and_, between, or_
-from app.models.vehicle import Vehicle
+import numpy as np
+from sqlalchemy import Row, func, and_, between, select
+from app.models.vehicle import LISTING_COLUMNS, Vehicle, canonicalize
 from app import db
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+LISTING_FETCH_SIZE = 200
 
 
 class VehicleRepository:
     """Data access layer for vehicle operations"""
 
     @staticmethod
-    def get_listings_with_filters(filters: dict, limit: int = 100) -> List[Vehicle]:
-        """Get vehicle listings matching multiple filters"""
-        query = db.session.query(Vehicle).filter(
-            and_(
-                Vehicle.year == filters["year"],
-                Vehicle.make == filters["make"],
-                Vehicle.model == filters["model"],
-                Vehicle.listing_price.isnot(None)
-            )
-        )
+    def _filter_conditions(filters: dict) -> list:
+        """Build the WHERE conditions shared by the listing queries"""
+        conditions = [
+            Vehicle.year == filters["year"],
+            Vehicle.make == canonicalize(filters["make"]),
+            Vehicle.model == canonicalize(filters["model"]),
+            Vehicle.listing_price.isnot(None),
+        ]
 
         if filters.get("trim"):
-            query = query.filter(Vehicle.trim == filters["trim"])
+            conditions.append(Vehicle.trim == filters["trim"])
         if filters.get("color"):
-            query = query.filter(Vehicle.exterior_color == filters["color"])
+            conditions.append(Vehicle.exterior_color == canonicalize(filters["color"]))
         if filters.get("dealer_state"):
-            query = query.filter(Vehicle.dealer_state == filters["dealer_state"])
+            conditions.append(
+                Vehicle.dealer_state == canonicalize(filters["dealer_state"])
+            )
         if filters.get("mileage"):
             lower_bound = int(filters["mileage"] * 0.8)
             upper_bound = int(filters["mileage"] * 1.2)
-            query = query.filter(between(Vehicle.listing_mileage, lower_bound, upper_bound))
+            conditions.append(
+                between(Vehicle.listing_mileage, lower_bound, upper_bound)
+            )
 
-        query = query.order_by(Vehicle.listing_mileage)
-        
-        if limit:
-            query = query.limit(limit)
+        return conditions
 
-        return query.all()
+    @staticmethod
+    def get_listing_tuples(filters: dict, limit: int = 100) -> Iterator[Row]:
+        """
+        Get the serialized listing columns as Core rows, skipping ORM hydration
+        Rows are streamed from the database in batches of LISTING_FETCH_SIZE
+        """
+        return db.session.execute(
+            select(*LISTING_COLUMNS)
+            .where(and_(*VehicleRepository._filter_conditions(filters)))
+            .order_by(Vehicle.listing_mileage)
+            .limit(limit)
+            .execution_options(yield_per=LISTING_FETCH_SIZE)
+        )
+
+    @staticmethod
+    def count_listings(filters: dict) -> int:
+        """Count listings matching multiple filters"""
+        return db.session.execute(
+            select(func.count())
+            .select_from(Vehicle)
+            .where(and_(*VehicleRepository._filter_conditions(filters)))
+        ).scalar_one()
 
     @staticmethod
-    def get_average_price_with_filters(filters: dict) -> Optional[float]:
-        """Calculate average price with multiple filters"""
-        query = db.session.query(func.avg(Vehicle.listing_price)).filter(
-            and_(
-                Vehicle.year == filters["year"],
-                Vehicle.make == filters["make"],
-                Vehicle.model == filters["model"],
-                Vehicle.listing_price.isnot(None),
+    def get_listings_and_avg(
+        filters: dict, limit: int = 100
+    ) -> Tuple[List[dict], Optional[float]]:
+        """
+        Get listing dicts and the average price of all matches in one round-trip
+        The average is a window over the full match set, computed before LIMIT
+        """
+        rows = db.session.execute(
+            select(
+                func.avg(Vehicle.listing_price).over().label("avg_price"),
+                *LISTING_COLUMNS,
             )
+            .where(and_(*VehicleRepository._filter_conditions(filters)))
+            .order_by(Vehicle.listing_mileage)
+            .limit(limit)
+        ).all()
+
+        if not rows:
+            return [], None
+
+        avg_price = rows[0].avg_price
+        return (
+            [Vehicle.row_to_dict(row) for row in rows],
+            float(avg_price) if avg_price else None,
         )
 
-        if filters.get("trim"):
-            query = query.filter(Vehicle.trim == filters["trim"])
-        if filters.get("color"):
-            query = query.filter(Vehicle.exterior_color == filters["color"])
-        if filters.get("dealer_state"):
-            query = query.filter(Vehicle.dealer_state == filters["dealer_state"])
-        if filters.get("mileage"):
-            lower_bound = int(filters["mileage"] * 0.8)
-            upper_bound = int(filters["mileage"] * 1.2)
-            query = query.filter(
-                between(Vehicle.listing_mileage, lower_bound, upper_bound)
+    @staticmethod
+    def get_regression_rows(year: int, make: str, model: str) -> List[Row]:
+        """Get (price, mileage, trim, exterior_color, dealer_state) rows for training"""
+        return db.session.execute(
+            select(
+                Vehicle.listing_price,
+                Vehicle.listing_mileage,
+                Vehicle.trim,
+                Vehicle.exterior_color,
+                Vehicle.dealer_state,
+            ).where(
+                and_(
+                    *VehicleRepository._filter_conditions(
+                        {"year": year, "make": make, "model": model}
+                    )
+                )
             )
-
-        result = query.scalar()
-        return float(result) if result else None
+        ).all()
 
     @staticmethod
-    def get_makes_by_year(year: int) -> List[str]:
-        """Get distinct makes for a given year"""
-        return [
-            row[0]
-            for row in db.session.query(Vehicle.make)
-            .filter(Vehicle.year == year)
-            .distinct()
-            .all()
-        ]
+    def get_feature_arrays(year: int, make: str, model: str) -> Dict[str, np.ndarray]:
+        """Get the regression feature columns of all matching listings as arrays"""
+        rows = VehicleRepository.get_regression_rows(year, make, model)
+
+        price, mileage, trim, exterior_color, dealer_state = (
+            zip(*rows) if rows else ((), (), (), (), ())
+        )
+
+        return {
+            "price": np.array(price, dtype=np.float64),
+            "mileage": np.array(mileage, dtype=np.float64),
+            "trim": np.array(trim, dtype=object),
+            "exterior_color": np.array(exterior_color, dtype=object),
+            "dealer_state": np.array(dealer_state, dtype=object),
+        }
 
     @staticmethod
-    def get_models_by_make_year(year: int, make: str) -> List[str]:
-        """Get distinct models for a given make and year"""
+    def get_all_year_make_model_triples(
+        start_year: int, end_year: int
+    ) -> List[Tuple[int, str, str]]:
+        """Get every distinct (year, make, model) in a year range with one query"""
         return [
-            row[0]
-            for row in db.session.query(Vehicle.model)
-            .filter(and_(Vehicle.year == year, Vehicle.make == make))
+            (row.year, row.make, row.model)
+            for row in db.session.query(Vehicle.year, Vehicle.make, Vehicle.model)
+            .filter(between(Vehicle.year, start_year, end_year))
             .distinct()
-            .all()
+            .order_by(Vehicle.year, Vehicle.make, Vehicle.model)
         ]
@@ -1,4 +1,6 @@
 from datetime import datetime
+from functools import lru_cache
+import re
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LinearRegression
@@ -8,58 +10,93 @@ from sklearn.preprocessing import StandardScaler
 from app.repositories.vehicle_repository import VehicleRepository
 from typing import List, Optional, Tuple
 
+PREMIUM_TRIMS = ["limited", "platinum", "sport", "titanium", "premium"]
+BUDGET_TRIMS = ["base", "s", "lx", "le"]
+PREMIUM_TRIM_RE = re.compile("|".join(PREMIUM_TRIMS))
+BUDGET_TRIM_RE = re.compile("|".join(BUDGET_TRIMS))
+PREMIUM_COLORS = ["black", "white", "silver", "gray"]
+HIGH_COST_STATES = ["CA", "NY", "WA"]
+
+
+@lru_cache(maxsize=1024)
+def _trim_to_numeric(trim):
+    """Convert trim level to a numeric value"""
+    if not trim:
+        return 0
+    trim = trim.lower()
+
+    if PREMIUM_TRIM_RE.search(trim):
+        return 2
+    elif BUDGET_TRIM_RE.search(trim):
+        return 0
+    return 1
+
+
+@lru_cache(maxsize=1024)
+def _is_premium_color(color):
+    """Check if color is considered premium"""
+    if not color:
+        return 0
+    return 1 if color.lower() in PREMIUM_COLORS else 0
+
+
+@lru_cache(maxsize=1024)
+def _is_high_cost_state(state):
+    """Check if state is high cost"""
+    if not state:
+        return 0
+    return 1 if state.upper() in HIGH_COST_STATES else 0
+
 
 class RegressionService:
     @staticmethod
     def train_model_for_vehicle(
         year: int, make: str, model: str, features_to_use: List[str]
-    ) -> Tuple[Optional[LinearRegression], Optional[StandardScaler], List[str]]:
+    ) -> Tuple[Optional[np.ndarray], Optional[float], List[str], Optional[float]]:
         """
         Train a regression model using specified features
-        Returns: (model, scaler, successfully_used_features)
+        The scaler is folded into the coefficients, so a prediction on raw
+        feature values x is np.dot(x, weights) + intercept
+        Returns: (weights, intercept, successfully_used_features, rmse)
         """
-        filters = {
-            "year": year,
-            "make": make,
-            "model": model,
-            "listing_price": True,
-            "listing_mileage": True,
-        }
-        listings = VehicleRepository.get_listings_with_filters(filters, limit=None)
-
-        if not listings or len(listings) < 10:
-            return None, None, []
-
-        data = []
-        for vehicle in listings:
-            entry = {"price": vehicle.listing_price}
-
-            if "mileage" in features_to_use:
-                entry["mileage"] = vehicle.listing_mileage
-            if "trim" in features_to_use:
-                entry["trim"] = RegressionService._trim_to_numeric(vehicle.trim)
-            if "color" in features_to_use:
-                entry["color"] = RegressionService._is_premium_color(
-                    vehicle.exterior_color
-                )
-            if "state" in features_to_use:
-                entry["state"] = RegressionService._is_high_cost_state(
-                    vehicle.dealer_state
-                )
-
-            data.append(entry)
-
-        df = pd.DataFrame(data).dropna()
-
-        available_features = [
-            f for f in features_to_use if f in df.columns and len(df[f].unique()) > 1
-        ]
-
-        if len(available_features) == 0 or len(df) < 5:
+        arrays = VehicleRepository.get_feature_arrays(year, make, model)
+
+        if len(arrays["price"]) < 10:
+            return None, None, [], None
+
+        columns = {}
+        if "mileage" in features_to_use:
+            columns["mileage"] = arrays["mileage"]
+        if "trim" in features_to_use:
+            columns["trim"] = RegressionService._trims_to_numeric(arrays["trim"])
+        if "color" in features_to_use:
+            columns["color"] = RegressionService._premium_color_flags(
+                arrays["exterior_color"]
+            )
+        if "state" in features_to_use:
+            columns["state"] = RegressionService._high_cost_state_flags(
+                arrays["dealer_state"]
+            )
+
+        features = [f for f in features_to_use if f in columns]
+        if not features:
             return None, None, [], None
 
-        X = df[available_features]
-        y = df["price"]
+        X = np.column_stack(
+            [np.asarray(columns[f], dtype=np.float64) for f in features]
+        )
+        y = arrays["price"]
+
+        complete = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+        X, y = X[complete], y[complete]
+
+        varying = [i for i in range(len(features)) if np.unique(X[:, i]).size > 1]
+        available_features = [features[i] for i in varying]
+
+        if len(available_features) == 0 or len(y) < 5:
+            return None, None, [], None
+
+        X = X[:, varying]
 
         try:
             scaler = StandardScaler()
@@ -69,7 +106,12 @@ class RegressionService:
             
             rmse = RegressionService._calculate_rmse(model, X_scaled, y)
 
-            return model, scaler, available_features, rmse
+            weights = model.coef_ / scaler.scale_
+            intercept = float(
+                model.intercept_ - np.dot(scaler.mean_ / scaler.scale_, model.coef_)
+            )
+
+            return weights, intercept, available_features, rmse
 
         except Exception as e:
             print(f"Error training model: {str(e)}")
@@ -94,34 +136,31 @@ class RegressionService:
             print(f"Error calculating RMSE: {str(e)}")
             return None
 
-    @staticmethod
-    def _trim_to_numeric(trim):
-        """Convert trim level to a numeric value"""
-        if not trim:
-            return 0
-        trim = trim.lower()
+    _trim_to_numeric = staticmethod(_trim_to_numeric)
+    _is_premium_color = staticmethod(_is_premium_color)
+    _is_high_cost_state = staticmethod(_is_high_cost_state)
 
-        premium_trims = ["limited", "platinum", "sport", "titanium", "premium"]
-        budget_trims = ["base", "s", "lx", "le"]
+    @staticmethod
+    def _encode_by_value(values: np.ndarray, encoder) -> np.ndarray:
+        """
+        Apply a scalar encoder to an array by encoding each distinct value once
+        Missing values get encoder(None)
+        """
+        codes, uniques = pd.factorize(values)
+        table = np.array([encoder(value) for value in uniques] + [encoder(None)])
+        return table[codes]
 
-        if any(p in trim for p in premium_trims):
-            return 2
-        elif any(b in trim for b in budget_trims):
-            return 0
-        return 1
+    @staticmethod
+    def _trims_to_numeric(trims: np.ndarray) -> np.ndarray:
+        """Vectorized _trim_to_numeric over an array of trims"""
+        return RegressionService._encode_by_value(trims, _trim_to_numeric)
 
     @staticmethod
-    def _is_premium_color(color):
-        """Check if color is considered premium"""
-        if not color:
-            return 0
-        premium_colors = ["black", "white", "silver", "gray"]
-        return 1 if color.lower() in premium_colors else 0
+    def _premium_color_flags(colors: np.ndarray) -> np.ndarray:
+        """Vectorized _is_premium_color over an array of colors"""
+        return RegressionService._encode_by_value(colors, _is_premium_color)
 
     @staticmethod
-    def _is_high_cost_state(state):
-        """Check if state is high cost"""
-        if not state:
-            return 0
-        high_cost_states = ["CA", "NY", "WA"]
-        return 1 if state.upper() in high_cost_states else 0
+    def _high_cost_state_flags(states: np.ndarray) -> np.ndarray:
+        """Vectorized _is_high_cost_state over an array of states"""
+        return RegressionService._encode_by_value(states, _is_high_cost_state)
@@ -1,13 +1,64 @@
 from datetime import datetime
+from functools import lru_cache
+import hashlib
+import logging
+import re
+import time
 
 import numpy as np
 from app import cache
 from typing import Dict, List, Optional
 
-import pandas as pd
+from app.models.vehicle import Vehicle, canonicalize
 from app.repositories.vehicle_repository import VehicleRepository
 from app.services.regression_service import RegressionService
 
+logger = logging.getLogger(__name__)
+
+AVG_MILES_PER_YEAR = 12000
+
+PREMIUM_TRIM_RE = re.compile("limited|platinum|sport|titanium|premium|xlt|lariat")
+BUDGET_TRIM_RE = re.compile("base|s|lx|le")
+
+PREMIUM_BODY_COLORS = frozenset({"black", "white", "silver", "gray"})
+DISCOUNT_BODY_COLORS = frozenset({"wind chill pearl", "ice cap", "red"})
+
+STATE_PRICE_FACTORS = {
+    "CA": 1.20,
+    "NY": 1.08,
+    "WA": 1.07,
+    "TX": 0.97,
+    "OH": 0.95,
+    "MI": 0.93,
+}
+
+
+@lru_cache(maxsize=1)
+def _year_for_hour(hour: int) -> int:
+    return datetime.now().year
+
+
+def _current_year() -> int:
+    """Current calendar year, recomputed at most once an hour"""
+    return _year_for_hour(int(time.time() // 3600))
+
+
+def _cache_get(key: str):
+    """Read from the cache, treating a backend failure as a miss"""
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.exception("Cache read failed for %s", key)
+        return None
+
+
+def _cache_set(key: str, value) -> None:
+    """Write to the cache, ignoring a backend failure"""
+    try:
+        cache.set(key, value)
+    except Exception:
+        logger.exception("Cache write failed for %s", key)
+
 
 class VehicleService:
     """Business logic for vehicle valuation"""
@@ -36,44 +87,47 @@ class VehicleService:
         if dealer_state is not None:
             requested_features.append("state")
 
-        model_key = f"regression_{year}_{make}_{model}_" + "_".join(
-            sorted(requested_features)
+        if not requested_features:
+            return VehicleService._get_fallback_estimate(year, make, model)
+
+        model_key = VehicleService._model_fingerprint(
+            year, make, model, requested_features
         )
-        cached_result = cache.get(model_key)
-        regression_model, scaler, used_features, rmse = (
+        cached_result = _cache_get(model_key)
+        weights, intercept, used_features, rmse = (
             cached_result if cached_result else (None, None, [], None)
         )
 
-        if not regression_model and requested_features:
-            regression_model, scaler, used_features, rmse = (
+        if weights is None:
+            weights, intercept, used_features, rmse = (
                 RegressionService.train_model_for_vehicle(
                     year, make, model, requested_features
                 )
             )
-            if regression_model:
-                cache.set(model_key, (regression_model, scaler, used_features, rmse))
-
-        if regression_model and scaler and used_features:
-            input_features = {}
-            if "mileage" in used_features:
-                input_features["mileage"] = mileage
-            if "trim" in used_features:
-                input_features["trim"] = RegressionService._trim_to_numeric(trim)
-            if "color" in used_features:
-                input_features["color"] = RegressionService._is_premium_color(color)
-            if "state" in used_features:
-                input_features["state"] = RegressionService._is_high_cost_state(
-                    dealer_state
-                )
-
-            input_df = pd.DataFrame([input_features])
-            input_scaled = scaler.transform(input_df)
+            if weights is not None:
+                _cache_set(model_key, (weights, intercept, used_features, rmse))
+
+        if weights is not None and used_features:
+            input_features = {
+                "mileage": mileage,
+                "trim": RegressionService._trim_to_numeric(trim),
+                "color": RegressionService._is_premium_color(color),
+                "state": RegressionService._is_high_cost_state(dealer_state),
+            }
+            x = np.fromiter(
+                (input_features[f] for f in used_features),
+                dtype=np.float64,
+                count=len(used_features),
+            )
 
-            predicted_price = regression_model.predict(input_scaled)[0]
+            predicted_price = float(np.dot(x, weights) + intercept)
 
-            listings = VehicleRepository.get_listings_with_filters(
-                {"year": year, "make": make, "model": model}
-            )
+            listings = [
+                Vehicle.row_to_dict(row)
+                for row in VehicleRepository.get_listing_tuples(
+                    {"year": year, "make": make, "model": model}
+                )
+            ]
 
             rmse_percentage = None
             confidence = "medium"
@@ -88,7 +142,7 @@ class VehicleService:
 
             return {
                 "estimate": VehicleService._format_price(predicted_price),
-                "listings": [vehicle.to_dict() for vehicle in listings],
+                "listings": listings,
                 "calculation_date": datetime.utcnow().isoformat(),
                 "method": f"regression ({', '.join(used_features)})",
                 "model_accuracy": {
@@ -110,6 +164,23 @@ class VehicleService:
             year, make, model, mileage, trim, color, dealer_state
         )
 
+    @staticmethod
+    def _model_fingerprint(
+        year: int, make: str, model: str, features: List[str]
+    ) -> str:
+        """
+        Build the shared cache key for a trained regression model
+        The training row count is part of the key so new listings retrain the model
+        """
+        row_count = VehicleRepository.count_listings(
+            {"year": year, "make": make, "model": model}
+        )
+        digest = hashlib.sha1(
+            f"{year}|{canonicalize(make)}|{canonicalize(model)}|"
+            f"{','.join(sorted(features))}|{row_count}".encode()
+        ).hexdigest()
+        return f"regression_{digest}"
+
     @staticmethod
     def _get_fallback_estimate(
         year: int,
@@ -137,8 +208,7 @@ class VehicleService:
         if dealer_state:
             filters["dealer_state"] = dealer_state
 
-        listings = VehicleRepository.get_listings_with_filters(filters)
-        avg_price = VehicleRepository.get_average_price_with_filters(filters)
+        listings, avg_price = VehicleRepository.get_listings_and_avg(filters)
 
         if avg_price:
             original_price = avg_price
@@ -158,7 +228,7 @@ class VehicleService:
 
             return {
                 "estimate": VehicleService._format_price(avg_price),
-                "listings": [vehicle.to_dict() for vehicle in listings],
+                "listings": listings,
                 "calculation_date": datetime.utcnow().isoformat(),
                 "method": "adjusted_average",
                 "model_accuracy": {
@@ -224,36 +294,27 @@ class VehicleService:
         return f"${rounded:,.0f}"
 
     @staticmethod
+    @cache.memoize(timeout=86400)
     def get_makes_and_models() -> Dict[int, Dict[str, List[str]]]:
-        """Get all available years with makes and models"""
+        """
+        Get all available years with makes and models
+        Cached for a day; the importer invalidates it after loading new data
+        """
         result = {}
-        current_year = datetime.now().year
-
-        years = range(1990, current_year + 1)
-
-        for year in years:
-            makes = VehicleRepository.get_makes_by_year(year)
-            make_models = {}
-
-            for make in makes:
-                models = VehicleRepository.get_models_by_make_year(year, make)
-                make_models[make] = models
+        current_year = _current_year()
 
-            if make_models:
-                result[year] = make_models
+        for year, make, model in VehicleRepository.get_all_year_make_model_triples(
+            1990, current_year
+        ):
+            result.setdefault(year, {}).setdefault(make, []).append(model)
 
         return result
 
     @staticmethod
     def _adjust_for_mileage(base_price: float, mileage: int, year: int) -> float:
         """Apply non-linear mileage adjustment"""
-        current_year = datetime.now().year
-        vehicle_age = current_year - year
-
-        base_depreciation = 0.10 
-
-        avg_miles_per_year = 12000
-        expected_miles = vehicle_age * avg_miles_per_year
+        vehicle_age = _current_year() - year
+        expected_miles = vehicle_age * AVG_MILES_PER_YEAR
         mileage_diff = mileage - expected_miles
 
         if mileage_diff > 0:
@@ -269,40 +330,23 @@ class VehicleService:
     @staticmethod
     def _adjust_for_trim(price: float, trim: str) -> float:
         trim = trim.lower()
-        premium_trims = [
-            "limited",
-            "platinum",
-            "sport",
-            "titanium",
-            "premium",
-            "xlt",
-            "lariat",
-        ]
-        budget_trims = ["base", "s", "lx", "le"]
-
-        if any(keyword in trim for keyword in premium_trims):
+
+        if PREMIUM_TRIM_RE.search(trim):
             price *= 1.10
-        elif any(keyword in trim for keyword in budget_trims):
+        elif BUDGET_TRIM_RE.search(trim):
             price *= 0.95
         return price
 
     @staticmethod
     def _adjust_for_body_color(price: float, body_color: str) -> float:
         body_color = body_color.lower()
-        if body_color in ["black", "white", "silver", "gray"]:
+        if body_color in PREMIUM_BODY_COLORS:
             return price * 1.08
-        elif body_color in ["wind chill pearl", "ice cap", "red"]:
+        elif body_color in DISCOUNT_BODY_COLORS:
             return price * 0.97
         return price
 
     @staticmethod
     def _adjust_for_state(price: float, state: str) -> float:
-        state = state.upper()
-        high_cost_states = {"CA": 1.20, "NY": 1.08, "WA": 1.07}
-        low_cost_states = {"TX": 0.97, "OH": 0.95, "MI": 0.93}
-
-        if state in high_cost_states:
-            return price * high_cost_states[state]
-        elif state in low_cost_states:
-            return price * low_cost_states[state]
-        return price
+        factor = STATE_PRICE_FACTORS.get(state.upper())
+        return price * factor if factor else price
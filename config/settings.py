@@ -1,10 +1,29 @@
 import os
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 load_dotenv()
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 5)),
+        'pool_recycle': 3600,
+    }
+    # psycopg2-only: fold executemany inserts into multi-row VALUES pages
+    if (
+        SQLALCHEMY_DATABASE_URI
+        and make_url(SQLALCHEMY_DATABASE_URI).get_driver_name() == 'psycopg2'
+    ):
+        SQLALCHEMY_ENGINE_OPTIONS.update({
+            'executemany_mode': 'values_plus_batch',
+            'insertmanyvalues_page_size': 10000,
+            'executemany_batch_page_size': 500,
+        })
     SECRET_KEY = os.getenv('SECRET_KEY')
-    JSON_SORT_KEYS = False
\ No newline at end of file
+    JSON_SORT_KEYS = False
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'RedisCache')
+    CACHE_REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TIMEOUT = 3600
\ No newline at end of file
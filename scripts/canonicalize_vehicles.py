@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sqlalchemy import func, select, update
+from app import cache, create_app, db
+from app.models.vehicle import CANONICAL_COLUMNS, Vehicle
+from app.services.vehicle_service import VehicleService
+from tqdm import tqdm
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def canonicalize_existing_rows(batch_size: int = 50_000) -> int:
+    """
+    Rewrite make/model/color/state of stored vehicles in canonical form
+    Rows are updated in id ranges of batch_size, one commit per range, so
+    the backfill can be rerun safely if interrupted
+    Returns the row count reported by the database; must be called inside an
+    application context
+    """
+    table = Vehicle.__table__
+    min_id, max_id = db.session.execute(
+        select(func.min(table.c.id), func.max(table.c.id))
+    ).one()
+    if min_id is None:
+        return 0
+
+    stmt = update(table).values(
+        {col: func.upper(func.trim(table.c[col])) for col in CANONICAL_COLUMNS}
+    )
+    updated = 0
+    for start in tqdm(range(min_id, max_id + 1, batch_size), desc="Canonicalizing"):
+        result = db.session.execute(
+            stmt.where(table.c.id >= start, table.c.id < start + batch_size)
+        )
+        db.session.commit()
+        updated += result.rowcount
+
+    try:
+        cache.delete_memoized(VehicleService.get_makes_and_models)
+    except Exception:
+        logger.exception("Could not clear the makes/models cache")
+    return updated
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Canonicalize make/model/color/state of existing vehicles'
+    )
+    parser.add_argument('--batch-size', type=int, default=50_000,
+                      help='Rows updated per transaction (default: 50000)')
+
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        updated = canonicalize_existing_rows(args.batch_size)
+        logger.info(f"Canonicalized {updated} vehicles")
@@ -1,16 +1,26 @@
+import io
 import sys
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator, Tuple
 
-from sqlalchemy import text
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 from sqlalchemy.exc import IntegrityError
-from app import create_app, db
-from app.models.vehicle import Vehicle
+from app import cache, create_app, db
+from app.models.vehicle import CANONICAL_COLUMNS, Vehicle
+from app.services.vehicle_service import VehicleService
 from tqdm import tqdm
 import logging
 from datetime import datetime
@@ -18,109 +28,261 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# (column, SQL type name, max length) for every importable Vehicle column,
+# read once from the model so lengths and types cannot drift from the schema
+FIELDS = [
+    (column.name, type(column.type).__name__, getattr(column.type, "length", None))
+    for column in Vehicle.__table__.columns
+    if not column.primary_key
+]
+
+VEHICLE_COLUMNS = [name for name, _, _ in FIELDS]
+
+STR_LIMITS = {name: length for name, kind, length in FIELDS if kind == "String"}
+CATEGORICAL_COLS = [
+    "make",
+    "model",
+    "fuel_type",
+    "dealer_state",
+    "driven_wheels",
+    "exterior_color",
+    "interior_color",
+    "listing_status",
+    "style",
+]
+
+NUMERIC_DTYPES = {
+    name: {"Integer": "Int64", "Numeric": "Float64"}[kind]
+    for name, kind, _ in FIELDS
+    if kind in ("Integer", "Numeric")
+}
+INT_COLS = [col for col, dtype in NUMERIC_DTYPES.items() if dtype == "Int64"]
+# Integer columns are 32-bit INT on MySQL and PostgreSQL
+INT_RANGE = (-(2 ** 31), 2 ** 31 - 1)
+
+BOOL_COLS = [name for name, kind, _ in FIELDS if kind == "Boolean"]
+
+DATE_COLS = [name for name, kind, _ in FIELDS if kind == "DateTime"]
+
+REQUIRED_COLUMNS = [
+    column.name
+    for column in Vehicle.__table__.columns
+    if not column.nullable and not column.primary_key
+]
+
+DEFAULT_WORKERS = max((os.cpu_count() or 1) - 1, 0)
+
+# ~50k rows per chunk; at most 2 * workers chunks are held in memory at once
+DEFAULT_READ_BLOCK_SIZE = 8 << 20
+
+# secondary indexes that can be rebuilt around a bulk load; the unique VIN
+# constraint stays in place so duplicate VINs are still skipped
+SECONDARY_INDEXES = sorted(
+    (index for index in Vehicle.__table__.indexes if not index.unique),
+    key=lambda index: index.name,
+)
+
+
 class DataImporter:
     @staticmethod
     def clean_data(df: pd.DataFrame) -> pd.DataFrame:
-        """Clean and normalize raw data"""
-        numeric_cols = ["year", "listing_price", "listing_mileage"]
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        bool_cols = ["used", "certified"]
-        for col in bool_cols:
-            df[col] = df[col].astype(str).str.upper() == "TRUE"
-
-        date_cols = ["first_seen_date", "last_seen_date", "dealer_vdp_last_seen_date"]
-        for col in date_cols:
-            df[col] = pd.to_datetime(df[col], errors="coerce")
-        
-        return df.where(pd.notnull(df), None)
+        """
+        Clean and normalize raw data into typed vehicle columns
+        Rows missing a required column are dropped; missing values stay as NA
+        """
+        df = df.reindex(columns=VEHICLE_COLUMNS)
+
+        numeric = df[list(NUMERIC_DTYPES)].apply(pd.to_numeric, errors="coerce")
+        ints = np.trunc(numeric[INT_COLS].astype("float64"))
+        # inf and values the INT columns cannot store are treated as missing
+        numeric[INT_COLS] = ints.where(ints.ge(INT_RANGE[0]) & ints.le(INT_RANGE[1]))
+        df = df.assign(**numeric.astype(NUMERIC_DTYPES))
+
+        df[BOOL_COLS] = (
+            df[BOOL_COLS].astype(str).apply(lambda s: s.str.upper()).eq("TRUE")
+        )
+        df[DATE_COLS] = df[DATE_COLS].apply(
+            pd.to_datetime, format="ISO8601", errors="coerce"
+        )
+
+        df[CATEGORICAL_COLS] = df[CATEGORICAL_COLS].astype("category")
+        for col, max_length in STR_LIMITS.items():
+            df[col] = DataImporter.clean_str_column(
+                df[col], max_length, col in CANONICAL_COLUMNS
+            )
 
+        valid_mask = df[REQUIRED_COLUMNS].notna().all(axis=1)
+        return df.loc[valid_mask]
 
     @staticmethod
-    def prepare_vehicle_dict(row: pd.Series) -> dict:
-        """Convert DataFrame row to vehicle dictionary with robust type safety and length checks"""
-        
-        def safe_str(value, max_length=None, default=None):
-            """Safely convert to string with length limit"""
-            if pd.isna(value) or value is None:
-                return default
-            value = str(value)
-            return value[:max_length] if max_length else value
-        
-        def safe_int(value, default=None):
-            """Safely convert to integer"""
-            try:
-                return int(value) if pd.notna(value) else default
-            except (ValueError, TypeError):
-                return default
-        
-        def safe_float(value, default=None):
-            """Safely convert to float"""
-            try:
-                return float(value) if pd.notna(value) else default
-            except (ValueError, TypeError):
-                return default
-        
-        def safe_bool(value, default=False):
-            """Safely convert to boolean"""
-            if pd.isna(value) or value is None:
-                return default
-            return bool(value)
-        
-        def safe_date(value, default=None):
-            """Safely convert to datetime"""
-            if pd.isna(value) or value is None:
-                return default
-            try:
-                return value.to_pydatetime()
-            except AttributeError:
-                return default
-            
-        required = {
-            'vin': safe_str(row.get('vin'), 17),
-            'year': safe_int(row.get('year')),
-            'make': safe_str(row.get('make'), 50),
-            'model': safe_str(row.get('model'), 50)
-        }
-        
-        if None in required.values():
-            missing = [k for k,v in required.items() if v is None]
-            logger.debug(f"Skipping VIN {row.get('vin')} - missing: {missing}")
-            return None
-        
-        return {
-            "vin": safe_str(row.get("vin"), 17),
-            "year": safe_int(row.get("year")),
-            "make": safe_str(row.get("make"), 50),
-            "model": safe_str(row.get("model"), 50),
-                        
-            "trim": safe_str(row.get("trim"), 100),
-            "dealer_name": safe_str(row.get("dealer_name"), 100),
-            "dealer_street": safe_str(row.get("dealer_street"), 100),
-            "dealer_city": safe_str(row.get("dealer_city"), 50),
-            "dealer_state": safe_str(row.get("dealer_state"), 20),
-            "dealer_zip": safe_str(row.get("dealer_zip"), 10),
-            "listing_price": safe_float(row.get("listing_price")),
-            "listing_mileage": safe_int(row.get("listing_mileage")),
-            "used": safe_bool(row.get("used"), default=True),
-            "certified": safe_bool(row.get("certified"), default=False),
-            "style": safe_str(row.get("style"), 100),
-            "driven_wheels": safe_str(row.get("driven_wheels"), 50),
-            "engine": safe_str(row.get("engine"), 100),
-            "fuel_type": safe_str(row.get("fuel_type"), 50),
-            "exterior_color": safe_str(row.get("exterior_color"), 50),
-            "interior_color": safe_str(row.get("interior_color"), 50),
-            "seller_website": safe_str(row.get("seller_website"), 255),
-            "first_seen_date": safe_date(row.get("first_seen_date")),
-            "last_seen_date": safe_date(row.get("last_seen_date")),
-            "dealer_vdp_last_seen_date": safe_date(row.get("dealer_vdp_last_seen_date")),
-            "listing_status": safe_str(row.get("listing_status"), 50)
-        }
+    def clean_str_column(
+        series: pd.Series, max_length: int, canonical: bool = False
+    ) -> pd.Series:
+        """
+        Clip a string column to max_length, canonicalizing case if requested
+        Categorical columns are transformed once per category, not once per row
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = DataImporter.clean_str_column(
+                pd.Series(series.cat.categories), max_length, canonical
+            )
+            values = categories.array.take(series.cat.codes.to_numpy(), allow_fill=True)
+            return pd.Series(values, index=series.index).astype("category")
+
+        series = series.astype("string")
+        if canonical:
+            series = series.str.strip().str.upper()
+        return series.str.slice(0, max_length)
 
     @staticmethod
-    def import_from_txt(file_path: str, batch_size: int = 1000) -> dict:
-        """Import data from pipe-delimited text file"""
+    def to_records(df: pd.DataFrame) -> list:
+        """Convert a cleaned frame to insert mappings, with None for missing values"""
+        return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+    @staticmethod
+    def read_chunks(
+        file_path: str, block_size: int = DEFAULT_READ_BLOCK_SIZE
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream a pipe-delimited file as DataFrames of roughly block_size bytes
+        Arrow's streaming reader parses one block at a time on a single thread;
+        every Vehicle column is read as a string and unknown feed columns are
+        skipped
+        """
+        def skip_bad_line(row) -> str:
+            logger.warning(f"Skipping malformed line {row.number}: {row.text!r}")
+            return "skip"
+
+        reader = pa_csv.open_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(block_size=block_size),
+            parse_options=pa_csv.ParseOptions(
+                delimiter="|", invalid_row_handler=skip_bad_line
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={col: pa.string() for col in VEHICLE_COLUMNS},
+                include_columns=VEHICLE_COLUMNS,
+                include_missing_columns=True,
+                strings_can_be_null=True,
+            ),
+        )
+        for batch in reader:
+            yield batch.to_pandas(types_mapper={pa.string(): pd.StringDtype()}.get)
+
+    @staticmethod
+    def clean_chunks(
+        chunks: Iterable[pd.DataFrame], workers: int
+    ) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """
+        Yield (raw_row_count, cleaned_chunk) for each chunk, in file order
+        With workers > 0, chunks are cleaned ahead in a process pool while the
+        caller inserts; at most 2 * workers chunks are in flight at a time
+        """
+        if workers <= 0:
+            for chunk in chunks:
+                yield len(chunk), DataImporter.clean_data(chunk)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                future = pool.submit(DataImporter.clean_data, chunk)
+                pending.append((len(chunk), future))
+                if len(pending) >= 2 * workers:
+                    row_count, future = pending.popleft()
+                    yield row_count, future.result()
+
+            while pending:
+                row_count, future = pending.popleft()
+                yield row_count, future.result()
+
+    @staticmethod
+    def insert_ignoring_duplicates(dialect_name: str):
+        """
+        Insert statement for vehicles that skips rows whose VIN already exists
+        Built on the table rather than the mapper so results carry a rowcount
+        """
+        table = Vehicle.__table__
+        if dialect_name == "mysql":
+            return insert(table).prefix_with("IGNORE")
+        if dialect_name == "postgresql":
+            return pg_insert(table).on_conflict_do_nothing(index_elements=["vin"])
+        if dialect_name == "sqlite":
+            return sqlite_insert(table).on_conflict_do_nothing(index_elements=["vin"])
+        return insert(table)
+
+    @staticmethod
+    def copy_chunk(df: pd.DataFrame) -> int:
+        """
+        Load a cleaned chunk through psycopg2's COPY support into a staging
+        table, then move it into vehicles skipping VINs that already exist
+        Returns the number of rows inserted
+        """
+        buffer = io.StringIO()
+        df.to_csv(
+            buffer, header=False, index=False, na_rep="\\N", columns=VEHICLE_COLUMNS
+        )
+        buffer.seek(0)
+
+        columns = ", ".join(VEHICLE_COLUMNS)
+        # only the loaded columns, so staging rows don't draw ids from the sequence
+        db.session.execute(text(
+            "CREATE TEMP TABLE vehicles_staging ON COMMIT DROP AS "
+            f"SELECT {columns} FROM vehicles WITH NO DATA"
+        ))
+        with db.session.connection().connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY vehicles_staging ({columns}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        result = db.session.execute(text(
+            f"INSERT INTO vehicles ({columns}) "
+            f"SELECT {columns} FROM vehicles_staging "
+            "ON CONFLICT (vin) DO NOTHING"
+        ))
+        db.session.execute(text("DROP TABLE vehicles_staging"))
+        return result.rowcount
+
+    @staticmethod
+    def drop_secondary_indexes() -> None:
+        """Drop the secondary vehicle indexes ahead of a bulk load"""
+        connection = db.session.connection()
+        for index in SECONDARY_INDEXES:
+            index.drop(bind=connection, checkfirst=True)
+        db.session.commit()
+
+    @staticmethod
+    def create_secondary_indexes() -> None:
+        """Recreate any secondary vehicle index that is missing"""
+        connection = db.session.connection()
+        for index in SECONDARY_INDEXES:
+            logger.info(f"Building index {index.name}")
+            index.create(bind=connection, checkfirst=True)
+        db.session.commit()
+
+    @staticmethod
+    def import_from_txt(
+        file_path: str,
+        read_block_size: int = DEFAULT_READ_BLOCK_SIZE,
+        insert_batch_size: int = 10_000,
+        workers: int = DEFAULT_WORKERS,
+        commit_every: int = 10,
+        rebuild_indexes: bool = False,
+    ) -> dict:
+        """
+        Import data from pipe-delimited text file
+        The file is parsed read_block_size bytes at a time, cleaned in a pool of
+        workers processes and each cleaned chunk is inserted in batches of
+        insert_batch_size rows
+        Duplicate VINs keep their last row in the chunk and VINs already in the
+        table are skipped; each batch runs in its own savepoint so a failing
+        batch is discarded on its own, and the transaction is committed every
+        commit_every batches
+        With rebuild_indexes, secondary indexes are dropped for the load and
+        built once at the end
+        Must be called inside an application context
+        """
         stats = {
             "total_rows": 0,
             "imported": 0,
@@ -129,47 +291,68 @@ class DataImporter:
             "start_time": datetime.now()
         }
 
-        app = create_app()
-        
-        with app.app_context():
-            try:
-                db.session.execute(text("SELECT 1"))
-                logger.info("Database connection successful")
-                
-                chunks = pd.read_csv(
-                    file_path,
-                    delimiter='|',
-                    chunksize=batch_size,
-                    encoding='utf-8',
-                    on_bad_lines='warn'
-                )
-
-                for chunk in tqdm(chunks, desc="Importing batches"):
-                    stats["total_rows"] += len(chunk)
-                    cleaned_chunk = DataImporter.clean_data(chunk)
-                    
-                    vehicles = [
-                        DataImporter.prepare_vehicle_dict(row) 
-                        for _, row in cleaned_chunk.iterrows()
-                        if pd.notna(row["vin"]) 
-                    ]
-                    
-                    vehicles = [v for v in vehicles if v is not None]
+        batches_since_commit = 0
+        try:
+            if rebuild_indexes:
+                DataImporter.drop_secondary_indexes()
+            # copy_expert is psycopg2-only; other drivers use the insert path
+            use_copy = db.engine.dialect.driver == "psycopg2"
+            insert_stmt = DataImporter.insert_ignoring_duplicates(db.engine.dialect.name)
+
+            chunks = DataImporter.read_chunks(file_path, read_block_size)
+
+            for row_count, cleaned_chunk in tqdm(
+                DataImporter.clean_chunks(chunks, workers),
+                desc="Importing batches",
+            ):
+                stats["total_rows"] += row_count
 
+                deduped = cleaned_chunk.drop_duplicates("vin", keep="last")
+                stats["skipped"] += len(cleaned_chunk) - len(deduped)
+                cleaned_chunk = deduped
+
+                for start in range(0, len(cleaned_chunk), insert_batch_size):
+                    batch = cleaned_chunk.iloc[start:start + insert_batch_size]
                     try:
-                        db.session.bulk_insert_mappings(Vehicle, vehicles)
-                        db.session.commit()
-                        stats["imported"] += len(vehicles)
-                        logger.debug(f"Inserted {len(vehicles)} records")
+                        with db.session.begin_nested():
+                            if use_copy:
+                                inserted = DataImporter.copy_chunk(batch)
+                            else:
+                                result = db.session.execute(
+                                    insert_stmt, DataImporter.to_records(batch)
+                                )
+                                inserted = result.rowcount
                     except Exception as e:
-                        db.session.rollback()
                         logger.error(f"Batch insert failed: {str(e)}")
-                        stats["errors"] += len(vehicles)
+                        stats["errors"] += len(batch)
+                        continue
 
-            except Exception as e:
-                logger.error(f"Import failed: {str(e)}")
-                raise
+                    stats["imported"] += inserted
+                    stats["skipped"] += len(batch) - inserted
+                    logger.debug(f"Inserted {inserted} records")
+
+                    batches_since_commit += 1
+                    if batches_since_commit >= commit_every:
+                        db.session.commit()
+                        batches_since_commit = 0
+
+        except Exception as e:
+            logger.error(f"Import failed: {str(e)}")
+            raise
+        finally:
+            try:
+                if batches_since_commit:
+                    db.session.commit()
             finally:
+                if rebuild_indexes:
+                    # discard a failed commit or partial drop, then restore
+                    db.session.rollback()
+                    DataImporter.create_secondary_indexes()
+                if stats["imported"]:
+                    try:
+                        cache.delete_memoized(VehicleService.get_makes_and_models)
+                    except Exception:
+                        logger.exception("Could not clear the makes/models cache")
                 stats["end_time"] = datetime.now()
                 stats["duration"] = stats["end_time"] - stats["start_time"]
 
@@ -180,8 +363,18 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description='Import vehicle data from TXT file')
     parser.add_argument('--file-path', required=True, help='Path to the text file')
-    parser.add_argument('--batch-size', type=int, default=1000,
-                      help='Records per batch (default: 1000)')
+    parser.add_argument('--read-block-size', type=int, default=DEFAULT_READ_BLOCK_SIZE,
+                      help='Bytes parsed from the file per chunk (default: 8 MiB)')
+    parser.add_argument('--insert-batch-size', type=int, default=10_000,
+                      help='Records per insert batch (default: 10000)')
+    parser.add_argument('--commit-every', type=int, default=10,
+                      help='Insert batches per transaction commit (default: 10)')
+    parser.add_argument('--rebuild-indexes', action='store_true',
+                      help='Drop secondary indexes during the load and rebuild '
+                           'them afterwards')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                      help='Processes cleaning chunks ahead of the inserts, '
+                           '0 to clean inline (default: CPU count - 1)')
     
     args = parser.parse_args()
 
@@ -189,7 +382,14 @@ if __name__ == "__main__":
     with app.app_context():
         db.create_all()
         logger.info(f"Starting import from {args.file_path}")
-        result = DataImporter.import_from_txt(args.file_path, args.batch_size)
+        result = DataImporter.import_from_txt(
+            args.file_path,
+            args.read_block_size,
+            args.insert_batch_size,
+            args.workers,
+            args.commit_every,
+            args.rebuild_indexes,
+        )
         
         logger.info("\nImport Summary:")
         logger.info(f"Total rows processed: {result['total_rows']}")
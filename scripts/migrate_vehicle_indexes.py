@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from sqlalchemy import Column, Index, MetaData, Table, inspect
+from app import create_app, db
+from app.models.vehicle import Vehicle
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COVERING_INDEX = next(
+    index for index in Vehicle.__table__.indexes if index.name == "idx_ymm_covering"
+)
+
+
+def detached_index(name: str, *column_names: str) -> Index:
+    """
+    Index on vehicles that is not registered on the Vehicle model
+    Indexes built from Vehicle.__table__ columns attach themselves to the model
+    and would then be created by db.create_all()
+    """
+    table = Table(
+        Vehicle.__tablename__,
+        MetaData(),
+        *(Column(column, Vehicle.__table__.c[column].type) for column in column_names),
+    )
+    return Index(name, *(table.c[column] for column in column_names))
+
+
+# superseded by idx_ymm_covering, which has the same leading columns
+LEGACY_INDEX = detached_index("idx_year_make_model", "year", "make", "model")
+
+
+def migrate_vehicle_indexes() -> None:
+    """
+    Bring the vehicles indexes of an existing database in line with the model
+    db.create_all() skips existing tables, so idx_ymm_covering is created here,
+    rebuilt if it was created with a different column order, and the legacy
+    idx_year_make_model is dropped once its replacement exists
+    Must be called inside an application context
+    """
+    existing = {
+        index["name"]: index["column_names"]
+        for index in inspect(db.engine).get_indexes(Vehicle.__tablename__)
+    }
+    connection = db.session.connection()
+
+    wanted = [column.name for column in COVERING_INDEX.columns]
+    current = existing.get(COVERING_INDEX.name)
+    if current != wanted:
+        if current is not None:
+            logger.info(f"Rebuilding {COVERING_INDEX.name} as {wanted}")
+            COVERING_INDEX.drop(bind=connection)
+        else:
+            logger.info(f"Creating {COVERING_INDEX.name}")
+        COVERING_INDEX.create(bind=connection)
+
+    if LEGACY_INDEX.name in existing:
+        logger.info(f"Dropping {LEGACY_INDEX.name}")
+        LEGACY_INDEX.drop(bind=connection)
+
+    db.session.commit()
+
+
+if __name__ == "__main__":
+    app = create_app()
+    with app.app_context():
+        migrate_vehicle_indexes()
+        logger.info("Vehicle indexes are up to date")
@@ -1,7 +1,7 @@
 import pytest
-from unittest.mock import MagicMock, patch
 from flask import Flask
-from app import db
+from app import cache, db
+from app.controllers.vehicle_controller import vehicle_bp
 
 
 @pytest.fixture(scope="module")
@@ -13,9 +13,7 @@ def app():
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
     db.init_app(app)
-
-    from app.controllers.vehicle_controller import vehicle_bp
-
+    cache.init_app(app, config={"CACHE_TYPE": "NullCache"})
     app.register_blueprint(vehicle_bp)
 
     with app.app_context():
@@ -30,20 +28,32 @@ def client(app):
             yield client
 
 
-@pytest.fixture(scope="function")
-def mock_vehicle_service():
-    """Mock the VehicleService"""
-    with patch("app.controllers.vehicle_controller.VehicleService") as mock:
-        yield mock
+def _set_repo_defaults(mock):
+    mock.get_listings_and_avg.return_value = ([], 18000)
+    mock.count_listings.return_value = 0
+    mock.get_all_year_make_model_triples.return_value = [(2015, "Toyota", "Camry")]
+
+
+@pytest.fixture(scope="module")
+def _vehicle_service_patch(module_mocker):
+    return module_mocker.patch("app.controllers.vehicle_controller.VehicleService")
+
+
+@pytest.fixture(scope="module")
+def _vehicle_repo_patch(module_mocker):
+    return module_mocker.patch("app.services.vehicle_service.VehicleRepository")
+
+
+@pytest.fixture
+def mock_vehicle_service(_vehicle_service_patch):
+    """Mock the VehicleService, patched once per module and reset per test"""
+    _vehicle_service_patch.reset_mock(return_value=True, side_effect=True)
+    return _vehicle_service_patch
 
 
-@pytest.fixture(scope="function")
-def mock_vehicle_repo():
-    """Mock the VehicleRepository"""
-    with patch("app.services.vehicle_service.VehicleRepository") as mock:
-        mock.get_average_price_with_filters.return_value = 18000
-        mock.get_listings_with_filters.return_value = []
-        mock.get_available_years.return_value = [2015, 2016]
-        mock.get_makes_by_year.return_value = ["Toyota"]
-        mock.get_models_by_make_year.return_value = ["Camry"]
-        yield mock
+@pytest.fixture
+def mock_vehicle_repo(_vehicle_repo_patch):
+    """Mock the VehicleRepository, patched once per module and reset per test"""
+    _vehicle_repo_patch.reset_mock(return_value=True, side_effect=True)
+    _set_repo_defaults(_vehicle_repo_patch)
+    return _vehicle_repo_patch
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from sqlalchemy import insert, select
+from app import db
+from app.models.vehicle import Vehicle
+from scripts.canonicalize_vehicles import canonicalize_existing_rows
+
+
+def test_canonicalize_existing_rows(app):
+    """Test legacy mixed-case rows are rewritten in canonical form"""
+    db.create_all()
+    # Core inserts bypass the canonicalizing mapper events, like legacy rows
+    db.session.execute(
+        insert(Vehicle.__table__),
+        [
+            {"vin": f"LEGACY{i}", "year": 2015, "make": " Toyota", "model": "Camry",
+             "exterior_color": "black", "dealer_state": None}
+            for i in range(3)
+        ],
+    )
+    db.session.commit()
+
+    canonicalize_existing_rows(batch_size=2)
+
+    rows = db.session.execute(
+        select(Vehicle.make, Vehicle.model, Vehicle.exterior_color, Vehicle.dealer_state)
+    ).all()
+    assert set(rows) == {("TOYOTA", "CAMRY", "BLACK", None)}
+    assert len(rows) == 3
+
+
+def test_canonicalize_survives_cache_failure(app):
+    """Test an unreachable cache backend does not fail a committed backfill"""
+    db.create_all()
+    db.session.execute(
+        insert(Vehicle.__table__),
+        [{"vin": "CACHEDOWN", "year": 2016, "make": "honda ", "model": "Civic"}],
+    )
+    db.session.commit()
+
+    with patch("scripts.canonicalize_vehicles.cache.delete_memoized",
+               side_effect=ConnectionError):
+        canonicalize_existing_rows()
+
+    make = db.session.execute(
+        select(Vehicle.make).where(Vehicle.vin == "CACHEDOWN")
+    ).scalar_one()
+    assert make == "HONDA"
@@ -0,0 +1,155 @@
+from unittest.mock import MagicMock, patch
+
+from scripts.data_importer import SECONDARY_INDEXES, VEHICLE_COLUMNS, DataImporter
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.dialects import mysql, sqlite
+from app import db
+
+
+def make_raw_chunk():
+    return pd.DataFrame(
+        {
+            "vin": ["1HGCM82633A004352", None, "2T1BURHE0JC014795"],
+            "year": ["2015", "2016", "abc"],
+            "make": [" toyota", "Honda", "Ford"],
+            "model": ["Camry", "Civic", "F150"],
+            "trim": ["L" * 150, None, "XLT"],
+            "listing_price": ["15000", "12000", ""],
+            "listing_mileage": ["80000", None, "1000"],
+            "used": ["TRUE", "false", None],
+            "certified": ["False", "TRUE", None],
+            "exterior_color": ["black", None, "Red"],
+            "first_seen_date": ["2021-03-04", None, "not a date"],
+        }
+    )
+
+
+def test_clean_data_drops_rows_missing_required_fields():
+    """Test rows without vin/year/make/model are dropped"""
+    records = DataImporter.to_records(DataImporter.clean_data(make_raw_chunk()))
+
+    assert [r["vin"] for r in records] == ["1HGCM82633A004352"]
+
+
+def test_clean_data_normalizes_values():
+    """Test types, lengths, canonical case and missing values"""
+    record = DataImporter.to_records(DataImporter.clean_data(make_raw_chunk()))[0]
+
+    assert record["year"] == 2015
+    assert record["make"] == "TOYOTA"
+    assert record["model"] == "CAMRY"
+    assert record["exterior_color"] == "BLACK"
+    assert len(record["trim"]) == 100
+    assert record["listing_price"] == 15000.0
+    assert record["listing_mileage"] == 80000
+    assert record["used"] is True
+    assert record["certified"] is False
+    assert record["first_seen_date"].year == 2021
+    assert record["dealer_name"] is None
+
+
+def test_clean_data_drops_uncastable_integers():
+    """Test non-finite and out-of-range integers become missing, not errors"""
+    chunk = pd.DataFrame(
+        {
+            "vin": ["A1", "B2", "C3", "D4", "E5", "F6"],
+            "year": ["2015", "1e20", "inf", "2018", "2019", "2020"],
+            "make": ["Toyota"] * 6,
+            "model": ["Camry"] * 6,
+            "listing_mileage": [
+                "99999999999999999999", "-inf", "nan", "1000",
+                str(2 ** 31), str(2 ** 31 - 1),
+            ],
+        }
+    )
+
+    records = DataImporter.to_records(DataImporter.clean_data(chunk))
+
+    assert [r["vin"] for r in records] == ["A1", "D4", "E5", "F6"]
+    assert [r["listing_mileage"] for r in records] == [None, 1000, None, 2 ** 31 - 1]
+
+
+def test_insert_ignores_existing_vins():
+    """Test the insert statement skips duplicate VINs per dialect"""
+    mysql_sql = str(
+        DataImporter.insert_ignoring_duplicates("mysql").compile(dialect=mysql.dialect())
+    )
+    sqlite_sql = str(
+        DataImporter.insert_ignoring_duplicates("sqlite").compile(
+            dialect=sqlite.dialect()
+        )
+    )
+
+    assert mysql_sql.startswith("INSERT IGNORE INTO vehicles")
+    assert "ON CONFLICT (vin) DO NOTHING" in sqlite_sql
+
+
+def test_rebuild_indexes_survives_failed_commit(app):
+    """Test dropped indexes are restored even when the final commit fails"""
+    db.create_all()
+    real_commit = db.session.commit
+    calls = []
+
+    def commit():
+        calls.append(None)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        real_commit()
+
+    with patch.object(DataImporter, "read_chunks", return_value=[make_raw_chunk()]), \
+            patch.object(db.session, "commit", side_effect=commit):
+        with pytest.raises(RuntimeError):
+            DataImporter.import_from_txt("unused.txt", workers=0, rebuild_indexes=True)
+
+    names = {index["name"] for index in inspect(db.engine).get_indexes("vehicles")}
+    assert {index.name for index in SECONDARY_INDEXES} <= names
+
+
+def test_import_survives_cache_failure(app):
+    """Test an unreachable cache backend does not fail a committed import"""
+    db.create_all()
+    chunk = make_raw_chunk().assign(vin=["CACHEDOWN00000001", None, None])
+
+    with patch.object(DataImporter, "read_chunks", return_value=[chunk]), \
+            patch("scripts.data_importer.cache.delete_memoized",
+                  side_effect=ConnectionError):
+        stats = DataImporter.import_from_txt("unused.txt", workers=0)
+
+    assert stats["imported"] == 1
+
+
+def test_copy_chunk_stages_only_loaded_columns():
+    """Test the COPY path's SQL against a mocked psycopg2 cursor"""
+    df = DataImporter.clean_data(make_raw_chunk())
+
+    with patch("scripts.data_importer.db") as mock_db:
+        mock_db.session.execute.return_value.rowcount = 1
+        cursor = (
+            mock_db.session.connection.return_value
+            .connection.cursor.return_value.__enter__.return_value
+        )
+
+        inserted = DataImporter.copy_chunk(df)
+
+    statements = [str(call.args[0]) for call in mock_db.session.execute.call_args_list]
+    create, insert_sql, drop = statements
+    copy_sql, buffer = cursor.copy_expert.call_args.args
+    columns = ", ".join(VEHICLE_COLUMNS)
+
+    assert inserted == 1
+    assert create == (
+        "CREATE TEMP TABLE vehicles_staging ON COMMIT DROP AS "
+        f"SELECT {columns} FROM vehicles WITH NO DATA"
+    )
+    assert "LIKE" not in create
+    assert copy_sql == (
+        f"COPY vehicles_staging ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    )
+    assert buffer.getvalue().startswith("1HGCM82633A004352,2015,TOYOTA,CAMRY,")
+    assert insert_sql == (
+        f"INSERT INTO vehicles ({columns}) SELECT {columns} FROM vehicles_staging "
+        "ON CONFLICT (vin) DO NOTHING"
+    )
+    assert drop == "DROP TABLE vehicles_staging"
@@ -0,0 +1,57 @@
+from sqlalchemy import inspect
+from app import db
+from scripts.data_importer import SECONDARY_INDEXES
+from scripts.migrate_vehicle_indexes import (
+    COVERING_INDEX,
+    LEGACY_INDEX,
+    detached_index,
+    migrate_vehicle_indexes,
+)
+
+
+def vehicle_indexes():
+    return {
+        index["name"]: index["column_names"]
+        for index in inspect(db.engine).get_indexes("vehicles")
+    }
+
+
+def test_migrate_replaces_legacy_index(app):
+    """Test a pre-existing schema gets the covering index and loses the old one"""
+    db.create_all()
+    connection = db.session.connection()
+    COVERING_INDEX.drop(bind=connection)
+    LEGACY_INDEX.create(bind=connection)
+    db.session.commit()
+
+    migrate_vehicle_indexes()
+
+    indexes = vehicle_indexes()
+    assert indexes["idx_ymm_covering"] == [
+        "year", "make", "model", "listing_mileage", "listing_price"
+    ]
+    assert "idx_year_make_model" not in indexes
+
+
+def test_migrate_rebuilds_misordered_covering_index(app):
+    """Test a covering index with the old column order is rebuilt"""
+    db.create_all()
+    connection = db.session.connection()
+    COVERING_INDEX.drop(bind=connection)
+    detached_index(
+        "idx_ymm_covering",
+        "year", "make", "model", "listing_price", "listing_mileage",
+    ).create(bind=connection)
+    db.session.commit()
+
+    migrate_vehicle_indexes()
+    migrate_vehicle_indexes()
+
+    assert vehicle_indexes()["idx_ymm_covering"] == [
+        "year", "make", "model", "listing_mileage", "listing_price"
+    ]
+
+
+def test_legacy_index_is_not_part_of_the_model():
+    """Test the legacy index is not registered on the Vehicle table"""
+    assert LEGACY_INDEX.name not in {index.name for index in SECONDARY_INDEXES}
@@ -0,0 +1,65 @@
+from app.services.regression_service import RegressionService
+from unittest.mock import patch
+import numpy as np
+import pytest
+
+
+def test_vectorized_encoders_match_scalar_helpers():
+    """Test array encoders agree with the per-value helpers"""
+    trims = np.array(["Limited", "LX", "Custom", "XLE", None, "", "Sport S"], dtype=object)
+    colors = np.array(["Black", "red", None, "SILVER", ""], dtype=object)
+    states = np.array(["ca", "TX", None, "NY", ""], dtype=object)
+
+    assert RegressionService._trims_to_numeric(trims).tolist() == [
+        RegressionService._trim_to_numeric(t) for t in trims
+    ]
+    assert RegressionService._premium_color_flags(colors).tolist() == [
+        RegressionService._is_premium_color(c) for c in colors
+    ]
+    assert RegressionService._high_cost_state_flags(states).tolist() == [
+        RegressionService._is_high_cost_state(s) for s in states
+    ]
+
+
+def test_train_model_with_too_few_listings():
+    """Test training bails out when there is not enough data"""
+    with patch(
+        "app.services.regression_service.VehicleRepository.get_feature_arrays"
+    ) as mock_arrays:
+        mock_arrays.return_value = {
+            "price": np.array([15000.0, 16000.0]),
+            "mileage": np.array([50000.0, 40000.0]),
+            "trim": np.array(["LE", "XLE"], dtype=object),
+            "exterior_color": np.array(["Black", "Red"], dtype=object),
+            "dealer_state": np.array(["CA", "TX"], dtype=object),
+        }
+
+        result = RegressionService.train_model_for_vehicle(
+            2015, "Toyota", "Camry", ["mileage"]
+        )
+
+    assert result == (None, None, [], None)
+
+
+def test_train_model_for_vehicle():
+    """Test training a model on synthetic listings"""
+    mileage = np.linspace(10000, 100000, 20)
+    with patch(
+        "app.services.regression_service.VehicleRepository.get_feature_arrays"
+    ) as mock_arrays:
+        mock_arrays.return_value = {
+            "price": 30000 - 0.1 * mileage,
+            "mileage": mileage,
+            "trim": np.array(["LE"] * 20, dtype=object),
+            "exterior_color": np.array(["Black", "Red"] * 10, dtype=object),
+            "dealer_state": np.array(["CA"] * 20, dtype=object),
+        }
+
+        weights, intercept, features, rmse = RegressionService.train_model_for_vehicle(
+            2015, "Toyota", "Camry", ["mileage", "trim", "color"]
+        )
+
+    assert features == ["mileage", "color"]
+    assert rmse < 1
+    assert weights == pytest.approx([-0.1, 0], abs=1e-6)
+    assert intercept == pytest.approx(30000)
@@ -30,6 +30,24 @@ def test_search_success(client, mock_vehicle_service):
     assert len(data["listings"]) == 1
 
 
+def test_search_streams_multiple_listings(client, mock_vehicle_service):
+    """Test streamed search response is valid JSON with every listing"""
+    mock_vehicle_service.calculate_market_value.return_value = {
+        "estimate": "$15,000",
+        "listings": [{"vin": "A"}, {"vin": "B"}, {"vin": "C"}],
+        "method": "adjusted_average",
+    }
+
+    response = client.get(
+        "/search", query_string={"year": "2015", "make": "Toyota", "model": "Camry"}
+    )
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["method"] == "adjusted_average"
+    assert [listing["vin"] for listing in data["listings"]] == ["A", "B", "C"]
+
+
 def test_search_with_mileage(client, mock_vehicle_service):
     """Test search with mileage filter"""
     mock_vehicle_service.calculate_market_value.return_value = {